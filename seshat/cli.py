@@ -3,10 +3,15 @@ from pathlib import Path
 import click
 import sys
 import subprocess
-import json
 from dotenv import load_dotenv, find_dotenv
-from .core import commit_with_ai
-from .utils import validate_config, display_error, CONFIG_PATH
+from .core import (
+    check_staged_files,
+    commit_with_ai,
+    load_provider,
+    read_staged_diff,
+    remember_commit_message,
+)
+from .utils import validate_config, display_error, json_dumps, json_loads, CONFIG_PATH
 from .commands import cli
 
 
@@ -17,9 +22,20 @@ from .commands import cli
 @click.option("--verbose", "-v", is_flag=True, help="Verbose output")
 @click.option("--date", "-d", help="Data para o commit (formato aceito pelo Git)")
 @click.option("--max-diff", type=int, help="Limite máximo de caracteres para o diff")
-def commit(provider, model, yes, verbose, date, max_diff):
+@click.option("--no-cache", is_flag=True, help="Não consulta nem armazena mensagens no cache")
+@click.option(
+    "--no-classify",
+    is_flag=True,
+    help="Sempre usa a IA, sem classificar alterações triviais localmente",
+)
+def commit(provider, model, yes, verbose, date, max_diff, no_cache, no_classify):
     """Generate and execute AI-powered commits"""
     try:
+        # Os arquivos em stage são verificados antes da configuração, para que
+        # a falta de alterações não fique escondida por erros do provider. O
+        # diff lido aqui é reaproveitado por commit_with_ai.
+        check_staged_files()
+
         if provider:
             os.environ["AI_PROVIDER"] = provider
 
@@ -38,12 +54,26 @@ def commit(provider, model, yes, verbose, date, max_diff):
         if max_diff:
             os.environ["MAX_DIFF_SIZE"] = str(max_diff)
 
+        # O provider é criado uma única vez e repassado para commit_with_ai
+        selected_provider = load_provider(provider)
+
         # Passar o parâmetro yes como skip_confirmation para commit_with_ai
-        commit_message = commit_with_ai(provider=provider, model=model, verbose=verbose, skip_confirmation=yes)
+        commit_message = commit_with_ai(
+            provider=provider,
+            model=model,
+            verbose=verbose,
+            skip_confirmation=yes,
+            use_cache=not no_cache,
+            provider_instance=selected_provider,
+            classify=not no_classify,
+        )
 
         if yes or click.confirm(
             f"\n🤖 Mensagem de commit gerada com sucesso:\n\n{commit_message}"
         ):
+            # Diff lido antes do commit para alimentar o cache
+            diff = read_staged_diff()
+
             # Se a data for fornecida, use o parâmetro --date do Git
             if date:
                 subprocess.check_call(["git", "commit", "--date", date, "-m", commit_message])
@@ -51,6 +81,9 @@ def commit(provider, model, yes, verbose, date, max_diff):
             else:
                 subprocess.check_call(["git", "commit", "-m", commit_message])
                 click.secho("✓ Commit realizado com sucesso!", fg="green")
+
+            if not no_cache:
+                remember_commit_message(diff, commit_message)
         else:
             click.secho("❌ Commit cancelado", fg="red")
 
@@ -73,8 +106,7 @@ def config(api_key, provider, model, default_date, max_diff, warn_diff):
 
         config = {}
         if CONFIG_PATH.exists():
-            with open(CONFIG_PATH) as f:
-                config = json.load(f)
+            config = json_loads(CONFIG_PATH.read_bytes())
 
         modified = False
         if api_key:
@@ -111,8 +143,7 @@ def config(api_key, provider, model, default_date, max_diff, warn_diff):
             modified = True
 
         if modified:
-            with open(CONFIG_PATH, "w") as f:
-                json.dump(config, f)
+            CONFIG_PATH.write_text(json_dumps(config), encoding="utf-8")
             click.secho("✓ Configuração atualizada com sucesso!", fg="green")
         else:
             current_config = {
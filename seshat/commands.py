@@ -1,23 +1,34 @@
 import os
 import click
-import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv, find_dotenv
-from .utils import CONFIG_PATH
+from .utils import CONFIG_PATH, json_loads
 
 
-def load_environment():
-    """Carrega configurações de várias fontes na ordem correta"""
-    # 1. Carrega configuração global do pipx
-    global_config = {}
+def _read_global_config():
+    """Lê a configuração global do pipx"""
     if CONFIG_PATH.exists():
-        with open(CONFIG_PATH) as f:
-            global_config = json.load(f)
+        return json_loads(CONFIG_PATH.read_bytes())
+    return {}
 
-    # 2. Carrega .env local se existir
+
+def _load_local_env():
+    """Carrega o .env local se existir"""
     local_env = find_dotenv(usecwd=True)
     if local_env:
         load_dotenv(local_env)
 
+
+def load_environment():
+    """Carrega configurações de várias fontes na ordem correta"""
+    # 1 e 2. Lê a configuração global e carrega o .env local em paralelo,
+    # já que a busca pelo .env percorre os diretórios até a raiz
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        config_future = executor.submit(_read_global_config)
+        env_future = executor.submit(_load_local_env)
+        global_config = config_future.result()
+        env_future.result()
+
     # 3. Define variáveis de ambiente com prioridade para configuração local
     if "API_KEY" in global_config and not os.getenv("API_KEY"):
         os.environ["API_KEY"] = global_config["API_KEY"]
@@ -1,19 +1,24 @@
 import sys
 import subprocess
+import threading
 import click
 import os
+from functools import lru_cache
+from pathlib import Path
+from . import semcache
+from .git_backend import get_staged_diff
 from .providers import get_provider
-from .utils import display_error
+from .utils import changed_files, display_error, summarize_diff
+
+# Acima deste tamanho o diff é resumido antes de qualquer outro processamento
+HUGE_DIFF_SIZE = 200_000
 
 
 def check_staged_files():
     """Verifica se existem arquivos em stage"""
     try:
-        result = subprocess.run(
-            ["git", "diff", "--cached", "--name-only"], capture_output=True, text=True
-        )
-
-        if not result.stdout.strip():
+        # Usa o diff memoizado: a mesma execução do git serve para o commit
+        if not read_staged_diff().strip():
             raise ValueError(
                 "Nenhum arquivo em stage encontrado!\n"
                 "Use 'git add <arquivo>' para adicionar arquivos ao stage antes de fazer commit."
@@ -62,22 +67,194 @@ def validate_diff_size(diff, skip_confirmation=False):
     return True
 
 
+@lru_cache(maxsize=1)
+def _git_dirs():
+    """Localiza o diretório do git uma única vez por processo.
+
+    Retorna (git_dir, common_dir): em worktrees o index e o HEAD ficam no
+    git_dir, enquanto as refs ficam no diretório comum. Retorna None fora de
+    um repositório.
+    """
+    result = subprocess.run(
+        ["git", "rev-parse", "--absolute-git-dir", "--git-common-dir"],
+        capture_output=True,
+        text=True,
+    )
+    lines = result.stdout.splitlines()
+    if result.returncode != 0 or len(lines) != 2:
+        return None
+
+    # --git-common-dir pode ser relativo ao diretório atual
+    return Path(lines[0]), Path(os.path.abspath(lines[1]))
+
+
+def _index_signature():
+    """Assinatura do estado do repositório (HEAD + mtime do index).
+
+    Retorna None quando não é possível calcular a assinatura (ex.: fora de
+    um repositório), desativando o cache.
+    """
+    git_dirs = _git_dirs()
+    if git_dirs is None:
+        return None
+
+    git_dir, common_dir = git_dirs
+    try:
+        index_mtime = os.stat(git_dir / "index").st_mtime_ns
+        head = (git_dir / "HEAD").read_text().strip()
+    except OSError:
+        return None
+
+    # Em um branch, o HEAD aponta para uma ref cujo arquivo muda a cada commit
+    head_mtime = None
+    if head.startswith("ref: "):
+        try:
+            head_mtime = os.stat(common_dir / head[5:]).st_mtime_ns
+        except OSError:
+            pass
+
+    return (git_dir, head, head_mtime, index_mtime)
+
+
+@lru_cache(maxsize=1)
+def _git_diff_cached(index_sig):
+    """Gera o diff uma única vez por estado do index"""
+    return get_staged_diff()
+
+
+def read_staged_diff():
+    """Retorna o diff staged, reaproveitando o resultado enquanto o index não mudar"""
+    index_sig = _index_signature()
+    if index_sig is None:
+        return _git_diff_cached.__wrapped__(None)
+    return _git_diff_cached(index_sig)
+
+
 def get_git_diff(skip_confirmation=False):
     """Obtém o diff das alterações stageadas"""
     check_staged_files()
 
-    diff = subprocess.check_output(
-        ["git", "diff", "--staged"], stderr=subprocess.STDOUT
-    ).decode("utf-8")
+    diff = read_staged_diff()
 
     validate_diff_size(diff, skip_confirmation)
 
     return diff
 
 
-def commit_with_ai(provider, model, verbose, skip_confirmation=False):
+# Regras para diffs que podem ser classificados sem consultar a IA.
+# Cada regra recebe o caminho do arquivo e a primeira regra que aceitar
+# todos os arquivos alterados define o tipo do commit.
+_BUILD_FILES = {
+    "pyproject.toml",
+    "setup.cfg",
+    "Pipfile",
+    "Pipfile.lock",
+    "poetry.lock",
+}
+
+
+def _is_build_file(path):
+    name = os.path.basename(path)
+    return name in _BUILD_FILES or (
+        name.startswith("requirements") and name.endswith(".txt")
+    )
+
+
+def _is_test_file(path):
+    name = os.path.basename(path)
+    return (
+        name.startswith("test_")
+        or name.endswith("_test.py")
+        or "tests" in path.split("/")[:-1]
+    )
+
+
+def _is_docs_file(path):
+    return path.lower().endswith((".md", ".rst")) or path.startswith("docs/")
+
+
+_TRIVIAL_RULES = [
+    (_is_build_file, "build", "dependências"),
+    (_is_test_file, "test", "testes"),
+    (_is_docs_file, "docs", "documentação"),
+]
+
+_TRIVIAL_VERBS = {"added": "adiciona", "deleted": "remove"}
+
+
+def classify_trivial(diff):
+    """Gera a mensagem de commit sem IA para diffs triviais.
+
+    Retorna None quando o diff não se encaixa inteiramente em uma das regras
+    (ex.: só documentação, só testes ou só arquivos de dependências).
+    """
+    files = changed_files(diff)
+    if not files:
+        return None
+
+    # O verbo segue o status dos arquivos: "atualiza" quando há mistura
+    statuses = {status for _, status in files}
+    verb = _TRIVIAL_VERBS.get(statuses.pop()) if len(statuses) == 1 else None
+    verb = verb or "atualiza"
+
+    for matches, commit_type, subject in _TRIVIAL_RULES:
+        if all(matches(path) for path, _ in files):
+            if len(files) == 1:
+                subject = os.path.basename(files[0][0])
+            return f"{commit_type}: {verb} {subject}"
+
+    return None
+
+
+def _reduce_huge_diff(diff):
+    """Resume diffs gigantes; diffs normais são retornados sem alteração.
+
+    Usado tanto na busca quanto no armazenamento do cache, para que os dois
+    embeddings sejam calculados sobre o mesmo texto.
+    """
+    if len(diff) > HUGE_DIFF_SIZE:
+        return summarize_diff(diff)
+    return diff
+
+
+def load_provider(provider):
+    """Obtém o provider pelo nome, com mensagem de erro amigável"""
+    try:
+        return get_provider(provider)
+    except KeyError:
+        raise ValueError(f"Provedor não suportado: {provider}")
+
+
+def commit_with_ai(
+    provider,
+    model,
+    verbose,
+    skip_confirmation=False,
+    use_cache=True,
+    provider_instance=None,
+    classify=True,
+):
     """Fluxo principal de commit"""
-    diff = get_git_diff(skip_confirmation)
+    # A falta de arquivos em stage é reportada antes de erros de configuração
+    # do provider; o diff lido aqui fica memoizado para get_git_diff
+    check_staged_files()
+
+    # O provider é criado antes da validação do diff para que suas
+    # verificações de rede (ex.: Ollama) ocorram em paralelo
+    selectedProvider = provider_instance or load_provider(provider)
+
+    raw_diff = get_git_diff(skip_confirmation)
+
+    # Diffs gigantes (arquivos gerados, binários versionados) são resumidos
+    # para não pesar no cache nem no envio para a IA
+    if len(raw_diff) > HUGE_DIFF_SIZE:
+        click.secho(
+            f"\n⚠️ Diff muito grande ({len(raw_diff)} caracteres). "
+            "Apenas um resumo das alterações será analisado.\n"
+            "Considere remover arquivos gerados ou binários do stage.\n",
+            fg="yellow",
+        )
+    diff = _reduce_huge_diff(raw_diff)
 
     if verbose:
         click.echo("📋 Diff analysis:")
@@ -88,20 +265,58 @@ def commit_with_ai(provider, model, verbose, skip_confirmation=False):
         warn_diff = os.getenv("WARN_DIFF_SIZE", "2500")
         click.echo(f"📏 Limites configurados: max={max_diff}, warn={warn_diff}")
 
-    try:
-        selectedProvider = get_provider(provider)
-        # Obtém o nome do provider a partir do objeto selecionado
-        provider_name = selectedProvider.name if hasattr(selectedProvider, 'name') else provider
-        click.echo(f"🤖 Commit gerado com {provider_name}:")
-        commit_msg = selectedProvider.generate_commit_message(diff, model=model)
-            
-    except KeyError:
-        raise ValueError(f"Provedor não suportado: {provider}")
+    # A classificação usa o diff completo: o resumo pode omitir arquivos
+    trivial_msg = classify_trivial(raw_diff) if classify else None
+    if trivial_msg:
+        click.echo("⚡ Commit gerado sem IA (alteração trivial):")
+        return trivial_msg
+
+    if use_cache:
+        # A chave exata usa o diff completo: resumos de diffs diferentes
+        # podem ser idênticos
+        cached_msg = semcache.lookup_exact(raw_diff)
+        if cached_msg:
+            click.echo("♻️ Commit reaproveitado do cache:")
+            return cached_msg
 
+    # Daqui em diante a IA provavelmente será usada: a conexão é aberta em
+    # segundo plano enquanto o cache semântico é consultado. A thread é
+    # daemon para nunca atrasar a saída do processo (ex.: sem rede).
+    threading.Thread(target=selectedProvider.warm_up, daemon=True).start()
+
+    if use_cache:
+        cached_msg = semcache.lookup_similar(raw_diff, embed_text=diff)
+
+        # Um diff apenas semelhante só é reaproveitado com a confirmação do
+        # usuário. Com --yes não há como confirmar, então a IA é consultada;
+        # se o usuário recusar, a mensagem também é gerada pela IA.
+        if cached_msg and not skip_confirmation and click.confirm(
+            f"\n♻️ Mensagem encontrada no cache para um diff semelhante:\n\n"
+            f"{cached_msg}\n\nDeseja reaproveitá-la?"
+        ):
+            click.echo("♻️ Commit reaproveitado do cache (diff semelhante):")
+            return cached_msg
+
+    # Obtém o nome do provider a partir do objeto selecionado
+    provider_name = selectedProvider.name if hasattr(selectedProvider, 'name') else provider
+    click.echo(f"🤖 Commit gerado com {provider_name}:")
     if verbose:
         click.echo("🤖 AI-generated message:")
 
+    # Em modo verbose a resposta é exibida à medida que é recebida
+    on_delta = (lambda delta: click.echo(delta, nl=False)) if verbose else None
+    commit_msg = selectedProvider.generate_commit_message(
+        summarize_diff(diff), model=model, on_delta=on_delta
+    )
+    if verbose:
+        click.echo()
+
     return commit_msg
 
 
-__all__ = ["commit_with_ai"]
\ No newline at end of file
+def remember_commit_message(diff, commit_msg):
+    """Armazena no cache a mensagem de um commit confirmado"""
+    semcache.store(diff, commit_msg, embed_text=_reduce_huge_diff(diff))
+
+
+__all__ = ["classify_trivial", "commit_with_ai", "load_provider", "read_staged_diff", "remember_commit_message"]
\ No newline at end of file
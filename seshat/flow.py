@@ -2,7 +2,7 @@ import os
 import click
 import sys
 import subprocess
-from .core import commit_with_ai
+from .core import commit_with_ai, read_staged_diff, remember_commit_message
 from .utils import display_error
 from .commands import cli
 
@@ -15,7 +15,13 @@ from .commands import cli
 @click.option("--verbose", "-v", is_flag=True, help="Verbose output")
 @click.option("--date", "-d", help="Data para o commit (formato aceito pelo Git)")
 @click.option("--path", "-p", help="Caminho para buscar arquivos modificados", default=".")
-def flow(count, provider, model, yes, verbose, date, path):
+@click.option("--no-cache", is_flag=True, help="Não consulta nem armazena mensagens no cache")
+@click.option(
+    "--no-classify",
+    is_flag=True,
+    help="Sempre usa a IA, sem classificar alterações triviais localmente",
+)
+def flow(count, provider, model, yes, verbose, date, path, no_cache, no_classify):
     """Processa e comita múltiplos arquivos individualmente.
     
     COUNT é o número máximo de arquivos a processar. Se for 0, processará todos os arquivos modificados.
@@ -77,9 +83,19 @@ def flow(count, provider, model, yes, verbose, date, path):
                 
                 # Gerar e executar commit
                 click.echo("🤖 Gerando commit...")
-                commit_message = commit_with_ai(provider=provider, model=model, verbose=verbose, skip_confirmation=yes)
+                commit_message = commit_with_ai(
+                    provider=provider,
+                    model=model,
+                    verbose=verbose,
+                    skip_confirmation=yes,
+                    use_cache=not no_cache,
+                    classify=not no_classify,
+                )
                 
                 if yes or click.confirm(f"\n📝 Mensagem de commit:\n\n{commit_message}\n\n✓ Confirmar?"):
+                    # Diff lido antes do commit para alimentar o cache
+                    diff = read_staged_diff()
+
                     # Executar commit
                     if date:
                         subprocess.check_call(["git", "commit", "--date", date, "-m", commit_message])
@@ -88,6 +104,9 @@ def flow(count, provider, model, yes, verbose, date, path):
                         subprocess.check_call(["git", "commit", "-m", commit_message])
                         click.secho("✓ Commit realizado com sucesso!", fg="green")
                     
+                    if not no_cache:
+                        remember_commit_message(diff, commit_message)
+
                     success_count += 1
                 else:
                     # Reverter o stage do arquivo
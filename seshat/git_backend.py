@@ -0,0 +1,56 @@
+import os
+import subprocess
+
+try:
+    import pygit2
+except ImportError:  # pygit2 é opcional
+    pygit2 = None
+
+_repository = None
+
+
+def _get_repository():
+    """Abre o repositório uma única vez e reaproveita nas chamadas seguintes"""
+    global _repository
+    if _repository is None:
+        path = pygit2.discover_repository(os.getcwd())
+        if path is None:
+            raise ValueError("Repositório Git não encontrado")
+        _repository = pygit2.Repository(path)
+    return _repository
+
+
+def _staged_diff_pygit2():
+    """Gera o diff staged em processo, sem criar um subprocesso do git"""
+    repo = _get_repository()
+    # O index pode ter sido alterado por outro processo (ex.: git add no flow)
+    repo.index.read()
+    flags = getattr(pygit2, "GIT_DIFF_MINIMAL", 0)
+    return repo.diff("HEAD", cached=True, flags=flags).patch or ""
+
+
+def _staged_diff_subprocess():
+    """Gera o diff staged executando o git"""
+    return subprocess.check_output(
+        ["git", "diff", "--staged", "--diff-algorithm=minimal", "--no-color"],
+        stderr=subprocess.STDOUT,
+    ).decode("utf-8", errors="replace")
+
+
+def get_staged_diff():
+    """Obtém o diff das alterações stageadas.
+
+    Usa o pygit2 quando disponível e recorre ao git via subprocesso caso
+    contrário ou quando o pygit2 não consegue gerar o diff (ex.: repositório
+    sem nenhum commit).
+    """
+    if pygit2 is not None:
+        try:
+            return _staged_diff_pygit2()
+        except (pygit2.GitError, KeyError, ValueError):
+            pass
+
+    return _staged_diff_subprocess()
+
+
+__all__ = ["get_staged_diff"]
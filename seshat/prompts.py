@@ -0,0 +1,43 @@
+COMMIT_PROMPT = """Você é um assistente de commits especialista em Conventional Commits. 
+
+Analise este diff e gere uma mensagem de commit, EM PORTUGUÊS DO BRASIL,  seguindo o padrão Conventional Commits:
+
+{diff}
+
+Formato exigido:
+<type>(optional scope): <description>
+
+[optional body]
+
+[optional footer(s)]
+
+É obrigatório:
+- <description> deve ser sempre em minúsculo
+
+Tipos permitidos:
+- feat: Nova funcionalidade
+- fix: Correção de bug
+- docs: Alterações na documentação
+- style: Mudanças de formatação
+- refactor: Refatoração de código
+- perf: Melhorias de performance
+- test: Adição/ajuste de testes
+- chore: Tarefas de manutenção
+- build: Mudanças no sistema de build
+- ci: Mudanças na CI/CD
+- revert: Reversão de commit
+
+Responda APENAS com a mensagem de commit, sem comentários extras."""
+
+SYSTEM_PROMPT = "Você é um assistente especializado em gerar mensagens de commit seguindo o padrão Conventional Commits."
+
+# Partes fixas do prompt, separadas uma única vez na importação do módulo
+_PROMPT_HEAD, _PROMPT_TAIL = COMMIT_PROMPT.split("{diff}")
+
+
+def build_prompt(diff):
+    """Monta o prompt de commit para o diff informado"""
+    return _PROMPT_HEAD + diff + _PROMPT_TAIL
+
+
+__all__ = ["COMMIT_PROMPT", "SYSTEM_PROMPT", "build_prompt"]
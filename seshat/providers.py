@@ -1,45 +1,37 @@
 import os
 import requests
-from anthropic import Anthropic
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import click
 import json
-from .utils import is_valid_conventional_commit
+from .prompts import SYSTEM_PROMPT, build_prompt
+from .utils import is_valid_conventional_commit, json_dumps_bytes, json_loads
 
-COMMIT_PROMPT = """Você é um assistente de commits especialista em Conventional Commits. 
+# Timeout padrão (conexão, leitura) para evitar bloqueios indefinidos
+DEFAULT_TIMEOUT = (3, 30)
+# Modelos locais podem levar bem mais tempo para gerar a resposta
+OLLAMA_TIMEOUT = (3, 120)
 
-Analise este diff e gere uma mensagem de commit, EM PORTUGUÊS DO BRASIL,  seguindo o padrão Conventional Commits:
+# Sessão compartilhada para reaproveitar conexões (keep-alive) entre requisições
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.2),
+)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
 
-{diff}
-
-Formato exigido:
-<type>(optional scope): <description>
-
-[optional body]
-
-[optional footer(s)]
-
-É obrigatório:
-- <description> deve ser sempre em minúsculo
-
-Tipos permitidos:
-- feat: Nova funcionalidade
-- fix: Correção de bug
-- docs: Alterações na documentação
-- style: Mudanças de formatação
-- refactor: Refatoração de código
-- perf: Melhorias de performance
-- test: Adição/ajuste de testes
-- chore: Tarefas de manutenção
-- build: Mudanças no sistema de build
-- ci: Mudanças na CI/CD
-- revert: Reversão de commit
-
-Responda APENAS com a mensagem de commit, sem comentários extras."""
+# Executor para verificações de rede que podem rodar em segundo plano
+_EXECUTOR = ThreadPoolExecutor(max_workers=2)
 
 
+@lru_cache(maxsize=4)
 def get_provider(provider_name):
+    """Retorna o provider, reaproveitando a instância (e suas conexões) no processo"""
     providers = {
         "deepseek": DeepSeekProvider,
         "claude": ClaudeProvider,
@@ -51,8 +43,17 @@ def get_provider(provider_name):
 
 class BaseProvider:
     def generate_commit_message(self, diff, **kwargs):
+        """Gera a mensagem de commit.
+
+        Se kwargs contiver on_delta, ele é chamado com cada trecho da
+        resposta à medida que é recebido.
+        """
         raise NotImplementedError
 
+    def warm_up(self):
+        """Prepara a conexão com o provedor antes da primeira requisição"""
+        pass
+
 
 class DeepSeekProvider(BaseProvider):
     def __init__(self):
@@ -66,6 +67,18 @@ class DeepSeekProvider(BaseProvider):
             raise ValueError("AI_MODEL não configurada para DeepSeek")
 
         self.base_url = "https://api.deepseek.com/v1/chat/completions"
+        self._warmed_up = False
+
+    def warm_up(self):
+        """Abre a conexão TCP+TLS com a API para ser reaproveitada pela sessão"""
+        # Basta uma vez por processo: depois a conexão fica no pool da sessão
+        if self._warmed_up:
+            return
+        self._warmed_up = True
+        try:
+            _SESSION.head("https://api.deepseek.com", timeout=2)
+        except requests.exceptions.RequestException:
+            pass
 
     def generate_commit_message(self, diff, **kwargs):
         headers = {
@@ -78,31 +91,66 @@ class DeepSeekProvider(BaseProvider):
             "messages": [
                 {
                     "role": "system",
-                    "content": "Você é um assistente especializado em gerar mensagens de commit seguindo o padrão Conventional Commits.",
+                    "content": SYSTEM_PROMPT,
                 },
-                {"role": "user", "content": COMMIT_PROMPT.format(diff=diff)},
+                {"role": "user", "content": build_prompt(diff)},
             ],
             "temperature": 0.3,
             "max_tokens": 400,
+            "stream": True,
         }
 
-        try:
-            response = requests.post(self.base_url, json=data, headers=headers)
-
-            # Verifica se a resposta é JSON válido
-            try:
-                response_json = response.json()
-            except json.JSONDecodeError:
-                raise ValueError(f"Resposta inválida da API: {response.text[:200]}")
+        on_delta = kwargs.get("on_delta")
 
-            if not response.ok:
-                error_msg = response_json.get("error", {}).get(
-                    "message", "Unknown error"
-                )
-                raise ValueError(f"API Error ({response.status_code}): {error_msg}")
+        try:
+            with _SESSION.post(
+                self.base_url,
+                data=json_dumps_bytes(data),
+                headers=headers,
+                timeout=DEFAULT_TIMEOUT,
+                stream=True,
+            ) as response:
+                if not response.ok:
+                    # Verifica se a resposta de erro é JSON válido
+                    try:
+                        response_json = json_loads(response.content)
+                    except json.JSONDecodeError:
+                        raise ValueError(f"Resposta inválida da API: {response.text[:200]}")
+
+                    error_msg = response_json.get("error", {}).get(
+                        "message", "Unknown error"
+                    )
+                    raise ValueError(f"API Error ({response.status_code}): {error_msg}")
+
+                # A resposta chega como Server-Sent Events: "data: {json}"
+                chunks = []
+                for line in response.iter_lines():
+                    if not line.startswith(b"data: "):
+                        continue
+
+                    payload = line[len(b"data: "):]
+                    if payload == b"[DONE]":
+                        break
+
+                    try:
+                        event = json_loads(payload)
+                    except json.JSONDecodeError:
+                        raise ValueError(
+                            f"Resposta inválida da API: {payload[:200].decode('utf-8', 'replace')}"
+                        )
+
+                    choices = event.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        chunks.append(delta)
+                        if on_delta:
+                            on_delta(delta)
+
+                commit_message = "".join(chunks).strip()
+                if not commit_message:
+                    raise ValueError("Resposta vazia da API")
 
-            commit_message = response_json["choices"][0]["message"]["content"].strip()
-            return commit_message
+                return commit_message
 
         except requests.exceptions.RequestException as e:
             raise ValueError(f"Erro na conexão com a API: {str(e)}")
@@ -116,45 +164,103 @@ class ClaudeProvider(BaseProvider):
         if not self.api_key:
             raise ValueError("API_KEY não configurada para Claude")
 
+        # Importado aqui para não pesar na inicialização dos demais provedores
+        import httpx
+        from anthropic import Anthropic
+
+        # HTTP/2 depende do pacote opcional h2 (httpx[http2])
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+
         # Inicializa o cliente com a api_key corretamente
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = Anthropic(
+            api_key=self.api_key,
+            http_client=httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(max_keepalive_connections=4),
+            ),
+        )
 
         self.model = os.getenv("AI_MODEL")
         if not self.model:
             raise ValueError("AI_MODEL não configurada para Claude")
 
     def generate_commit_message(self, diff, **kwargs):
+        on_delta = kwargs.get("on_delta")
+
         try:
             # Remove a configuração manual de headers pois o cliente já gerencia isso
-            response = self.client.messages.create(
+            with self.client.messages.stream(
                 model=self.model,
                 max_tokens=100,
                 temperature=0.3,
                 messages=[{
                     "role": "user", 
-                    "content": COMMIT_PROMPT.format(diff=diff)
+                    "content": build_prompt(diff)
                 }]
-            )
-            return response.content[0].text.strip()
+            ) as stream:
+                chunks = []
+                for delta in stream.text_stream:
+                    chunks.append(delta)
+                    if on_delta:
+                        on_delta(delta)
+
+            commit_message = "".join(chunks).strip()
+            if not commit_message:
+                raise ValueError("Resposta vazia do Claude")
+
+            return commit_message
         except Exception as e:
             raise ValueError(f"Erro com Claude API: {str(e)}")
 
 
+@lru_cache(maxsize=1)
+def _ollama_tags_cached():
+    """Consulta os modelos instalados no Ollama uma única vez por processo.
+
+    Retorna None se o Ollama não estiver rodando.
+    """
+    try:
+        response = _SESSION.get("http://localhost:11434/api/tags", timeout=2)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        return None
+
+    if response.status_code != 200:
+        return None
+
+    models = set()
+    for model in json_loads(response.content).get("models", []):
+        name = model.get("name", "")
+        models.add(name)
+        # "modelo:latest" também pode ser referenciado apenas como "modelo"
+        if name.endswith(":latest"):
+            models.add(name[: -len(":latest")])
+
+    return frozenset(models)
+
+
 class OllamaProvider(BaseProvider):
     def __init__(self):
         self.base_url = "http://localhost:11434/api/generate"
         self.default_model = "deepseek-coder-v2"
+        # A verificação roda em segundo plano enquanto o diff é preparado
+        self._models_future = _EXECUTOR.submit(_ollama_tags_cached)
 
-    def check_ollama_running(self):
-        """Verifica se o Ollama está rodando localmente"""
-        try:
-            response = requests.get("http://localhost:11434/api/version")
-            return response.status_code == 200
-        except requests.exceptions.ConnectionError:
-            return False
+    @property
+    def _models(self):
+        return self._models_future.result()
+
+    def check_model_available(self, model):
+        """Verifica se o modelo está instalado no Ollama"""
+        return self._models is not None and model in self._models
 
     def generate_commit_message(self, diff, **kwargs):
-        if not self.check_ollama_running():
+        # Uma única consulta a /api/tags indica se o Ollama está rodando
+        # e quais modelos estão instalados
+        if self._models is None:
             raise ValueError(
                 "Ollama não está rodando. Para usar o Ollama:\n"
                 "1. Instale o Ollama: https://ollama.ai\n"
@@ -163,45 +269,80 @@ class OllamaProvider(BaseProvider):
                 "\nOu use outro provedor com: seshat config --provider (deepseek|claude|openai)"
             )
 
+        if not self.check_model_available(self.default_model):
+            raise ValueError(
+                f"Modelo {self.default_model} não encontrado no Ollama.\n"
+                f"Baixe o modelo com: ollama pull {self.default_model}"
+            )
+
         data = {
             "model": self.default_model,
-            "prompt": COMMIT_PROMPT.format(diff=diff),
-            "stream": False,
+            "prompt": build_prompt(diff),
+            "stream": True,
         }
 
-        try:
-            response = requests.post(self.base_url, json=data)
-
-            if not response.ok:
-                raise ValueError(
-                    f"Erro na API do Ollama: {response.status_code} - {response.text}"
-                )
-
-            try:
-                response_data = response.json()
-                commit_message = response_data.get("response", "").strip()
+        on_delta = kwargs.get("on_delta")
 
-                if not commit_message:
-                    raise ValueError("Resposta vazia do Ollama")
-
-                if not is_valid_conventional_commit(commit_message):
-                    exemplos = (
-                        "Exemplos válidos:\n"
-                        "- feat: nova funcionalidade\n"
-                        "- fix(core): correção de bug\n"
-                        "- feat!: breaking change\n"
-                        "- feat(api)!: breaking change com escopo"
-                    )
+        try:
+            with _SESSION.post(
+                self.base_url,
+                data=json_dumps_bytes(data),
+                headers={"Content-Type": "application/json"},
+                timeout=OLLAMA_TIMEOUT,
+                stream=True,
+            ) as response:
+                if not response.ok:
                     raise ValueError(
-                        f"A mensagem não segue o padrão Conventional Commits.\n"
-                        f"Mensagem recebida: {commit_message}\n\n"
-                        f"{exemplos}"
+                        f"Erro na API do Ollama: {response.status_code} - {response.text}"
                     )
 
-                return commit_message
-
-            except json.JSONDecodeError:
-                raise ValueError(f"Resposta inválida do Ollama: {response.text[:200]}")
+                try:
+                    # Cada linha da resposta é um objeto JSON com um trecho da mensagem
+                    chunks = []
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+
+                        response_data = json_loads(line)
+                        if "error" in response_data:
+                            raise ValueError(
+                                f"Erro na API do Ollama: {response_data['error']}"
+                            )
+
+                        delta = response_data.get("response", "")
+                        if delta:
+                            chunks.append(delta)
+                            if on_delta:
+                                on_delta(delta)
+
+                        if response_data.get("done"):
+                            break
+
+                    commit_message = "".join(chunks).strip()
+
+                    if not commit_message:
+                        raise ValueError("Resposta vazia do Ollama")
+
+                    if not is_valid_conventional_commit(commit_message):
+                        exemplos = (
+                            "Exemplos válidos:\n"
+                            "- feat: nova funcionalidade\n"
+                            "- fix(core): correção de bug\n"
+                            "- feat!: breaking change\n"
+                            "- feat(api)!: breaking change com escopo"
+                        )
+                        raise ValueError(
+                            f"A mensagem não segue o padrão Conventional Commits.\n"
+                            f"Mensagem recebida: {commit_message}\n\n"
+                            f"{exemplos}"
+                        )
+
+                    return commit_message
+
+                except json.JSONDecodeError:
+                    raise ValueError(
+                        f"Resposta inválida do Ollama: {line[:200].decode('utf-8', 'replace')}"
+                    )
 
         except requests.exceptions.RequestException as e:
             if isinstance(e, requests.exceptions.ConnectionError):
@@ -220,6 +361,9 @@ class OpenAIProvider(BaseProvider):
         if not self.api_key:
             raise ValueError("API_KEY não configurada para OpenAI")
         
+        # Importado aqui para não pesar na inicialização dos demais provedores
+        from openai import OpenAI
+
         self.client = OpenAI(api_key=self.api_key)
 
         # Inicializa o cliente com a api_key
@@ -229,21 +373,37 @@ class OpenAIProvider(BaseProvider):
             raise ValueError("AI_MODEL não configurada para OpenAI")
 
     def generate_commit_message(self, diff, **kwargs):
+        on_delta = kwargs.get("on_delta")
+
         try:
-            response = self.client.chat.completions.create(model=self.model,
+            stream = self.client.chat.completions.create(model=self.model,
             max_tokens=400,
             temperature=0.3,
+            stream=True,
             messages=[
                 {
                     "role": "system",
-                    "content": "Você é um assistente especializado em gerar mensagens de commit seguindo o padrão Conventional Commits.",
+                    "content": SYSTEM_PROMPT,
                 },
                 {
                     "role": "user",
-                    "content": COMMIT_PROMPT.format(diff=diff)
+                    "content": build_prompt(diff)
                 }
             ])
-            return response.choices[0].message.content.strip()
+
+            chunks = []
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks.append(delta)
+                    if on_delta:
+                        on_delta(delta)
+
+            commit_message = "".join(chunks).strip()
+            if not commit_message:
+                raise ValueError("Resposta vazia do OpenAI")
+
+            return commit_message
         except Exception as e:
             raise ValueError(f"Erro com OpenAI API: {str(e)}")
 
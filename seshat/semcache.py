@@ -0,0 +1,201 @@
+import hashlib
+import math
+import re
+import sqlite3
+import subprocess
+import time
+import zlib
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+from .utils import CACHE_PATH, changed_files
+
+# Similaridade mínima (cosseno) para reaproveitar uma mensagem
+SIMILARITY_THRESHOLD = 0.97
+# Tempo de vida das entradas do cache (30 dias)
+CACHE_TTL = 30 * 24 * 60 * 60
+# Dimensão do vetor gerado pelo embedding local
+EMBEDDING_SIZE = 512
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1)
+def _repo_namespace():
+    """Identifica o repositório atual para separar as entradas do cache"""
+    result = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def embed(diff):
+    """Gera um embedding local do diff usando feature hashing.
+
+    Considera apenas o conteúdo das linhas adicionadas/removidas, diferenciando
+    tokens adicionados de removidos. Cabeçalhos e caminhos de arquivos ficam de
+    fora, pois são iguais entre alterações sem relação no mesmo arquivo. A
+    contagem é amortecida (1 + log) para que tokens repetidos não dominem o
+    vetor. Não depende de modelos nem de chamadas de rede.
+    """
+    counts = Counter()
+    for line in diff.splitlines():
+        if line.startswith(("+++", "---")) or not line.startswith(("+", "-")):
+            continue
+        prefix = line[0]
+        counts.update(prefix + token for token in _TOKEN_RE.findall(line[1:]))
+
+    vector = [0.0] * EMBEDDING_SIZE
+    for token, count in counts.items():
+        h = zlib.crc32(token.encode("utf-8"))
+        weight = 1.0 + math.log(count)
+        vector[h % EMBEDDING_SIZE] += weight if h & 0x80000000 else -weight
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        vector = [v / norm for v in vector]
+
+    return array("f", vector)
+
+
+def diff_key(diff):
+    """Chave exata do diff (SHA-256 do conteúdo)"""
+    return hashlib.sha256(diff.encode("utf-8")).hexdigest()
+
+
+def files_key(diff):
+    """Chave do conjunto de arquivos alterados pelo diff"""
+    paths = sorted({path for path, _ in changed_files(diff)})
+    return hashlib.sha256("\0".join(paths).encode("utf-8")).hexdigest()
+
+
+def _connect():
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(CACHE_PATH))
+    # Entradas antigas, sem a chave de arquivos, podiam casar alterações em
+    # arquivos diferentes e são descartadas
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(commit_cache)")]
+    if columns and "files_key" not in columns:
+        conn.execute("DROP TABLE commit_cache")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS commit_cache ("
+        " repo TEXT NOT NULL,"
+        " files_key TEXT NOT NULL,"
+        " embedding BLOB NOT NULL,"
+        " message TEXT NOT NULL,"
+        " created_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS commit_cache_files"
+        " ON commit_cache (repo, files_key, created_at)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS commit_cache_exact ("
+        " repo TEXT NOT NULL,"
+        " diff_hash TEXT NOT NULL,"
+        " message TEXT NOT NULL,"
+        " created_at REAL NOT NULL,"
+        " PRIMARY KEY (repo, diff_hash))"
+    )
+    return conn
+
+
+def lookup_exact(diff):
+    """Busca a mensagem de commit gerada para exatamente o mesmo diff.
+
+    Retorna None quando não há entrada ou se o cache não puder ser lido.
+    """
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                "SELECT message FROM commit_cache_exact"
+                " WHERE repo = ? AND diff_hash = ? AND created_at >= ?",
+                (_repo_namespace(), diff_key(diff), time.time() - CACHE_TTL),
+            ).fetchone()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return None
+
+    return row[0] if row else None
+
+
+def lookup_similar(diff, embed_text=None):
+    """Busca uma mensagem de commit gerada para um diff semelhante.
+
+    Só compara entradas que alteram exatamente o mesmo conjunto de arquivos.
+    A chave de arquivos usa o diff completo; embed_text (ex.: o resumo de um
+    diff gigante) é usado apenas para calcular o embedding. Retorna None
+    quando não há entrada suficientemente parecida ou se o cache não puder
+    ser lido.
+    """
+    query = embed(embed_text or diff)
+    if not any(query):
+        return None
+
+    try:
+        conn = _connect()
+        try:
+            rows = conn.execute(
+                "SELECT embedding, message FROM commit_cache"
+                " WHERE repo = ? AND files_key = ? AND created_at >= ?",
+                (_repo_namespace(), files_key(diff), time.time() - CACHE_TTL),
+            ).fetchall()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return None
+
+    best_message, best_score = None, SIMILARITY_THRESHOLD
+    for blob, message in rows:
+        candidate = array("f")
+        candidate.frombytes(blob)
+        score = sum(a * b for a, b in zip(query, candidate))
+        if score >= best_score:
+            best_message, best_score = message, score
+
+    return best_message
+
+
+def store(diff, message, embed_text=None):
+    """Armazena a mensagem de um commit confirmado.
+
+    Apenas o hash e o embedding são salvos, nunca o conteúdo do diff.
+    Entradas expiradas do repositório atual são removidas na mesma operação.
+    """
+    vector = embed(embed_text or diff)
+    repo = _repo_namespace()
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM commit_cache WHERE repo = ? AND created_at < ?",
+                    (repo, now - CACHE_TTL),
+                )
+                conn.execute(
+                    "DELETE FROM commit_cache_exact WHERE repo = ? AND created_at < ?",
+                    (repo, now - CACHE_TTL),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO commit_cache_exact"
+                    " (repo, diff_hash, message, created_at) VALUES (?, ?, ?, ?)",
+                    (repo, diff_key(diff), message, now),
+                )
+                if any(vector):
+                    conn.execute(
+                        "INSERT INTO commit_cache"
+                        " (repo, files_key, embedding, message, created_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (repo, files_key(diff), vector.tobytes(), message, now),
+                    )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+__all__ = ["lookup_exact", "lookup_similar", "store"]
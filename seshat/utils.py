@@ -4,7 +4,57 @@ import os
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+try:
+    # google-re2 garante tempo linear (DFA), sem backtracking
+    import re2 as _regex
+except ImportError:  # re2 é opcional
+    _regex = re
+
 CONFIG_PATH = Path.home() / ".seshat"
+CACHE_PATH = Path.home() / ".cache" / "seshat" / "cache.db"
+
+# Tipos permitidos pelo Conventional Commits (não case sensitive)
+TYPES = [
+    "feat",
+    "fix",
+    "docs",
+    "style",
+    "refactor",
+    "perf",
+    "test",
+    "chore",
+    "build",
+    "ci",
+    "revert",
+]
+
+# Alternância dos tipos usada no padrão do header
+_TYPES_ALT = "|".join(TYPES)
+
+# Padrão para o header:
+# - tipo (obrigatório)
+# - escopo (opcional, entre parênteses)
+# - ! (opcional, para breaking changes)
+# - : e espaço (obrigatório)
+# - descrição (obrigatório)
+_HEADER_RE = _regex.compile(
+    r"(?i)"  # não case sensitive (flag inline, aceita por re e re2)
+    r"^("  # início da string
+    r"(?P<type>" + _TYPES_ALT + r")"  # tipo
+    r"(?:\((?P<scope>[^)]+)\))?"  # escopo opcional
+    r"(?P<breaking>!)?"  # breaking change opcional
+    r": "  # : e espaço obrigatórios
+    r"(?P<description>.+)"  # descrição
+    r")$"
+)
+
+# Footers devem estar separados por linha em branco do corpo
+_FOOTER_RE = _regex.compile(r"(?i)BREAKING[ -]CHANGE: .*")
 
 
 def validate_config():
@@ -51,11 +101,93 @@ def validate_config():
     return config
 
 
+def json_loads(data):
+    """Decodifica JSON (str ou bytes) usando orjson quando disponível"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj):
+    """Codifica JSON em str usando orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def json_dumps_bytes(obj):
+    """Codifica JSON direto em bytes UTF-8, sem passar por uma str intermediária"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
 def display_error(message):
     """Exibe erros formatados"""
     click.secho(f"🚨 Erro: {message}", fg="red")
 
 
+def changed_files(diff):
+    """
+    Extrai os arquivos alterados dos cabeçalhos "diff --git a/... b/...".
+
+    Retorna uma lista de tuplas (caminho, status), onde status é "added",
+    "deleted" ou "modified".
+    """
+    files = []
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            path = line.rsplit(" b/", 1)[-1].strip('"')
+            files.append([path, "modified"])
+        elif files and line.startswith("new file mode"):
+            files[-1][1] = "added"
+        elif files and line.startswith("deleted file mode"):
+            files[-1][1] = "deleted"
+    return [tuple(f) for f in files]
+
+
+def summarize_diff(diff, max_chars=8000, max_hunk_lines=50):
+    """
+    Reduz o diff enviado para a IA mantendo o que é relevante para a mensagem.
+
+    - Remove linhas "index ..." e o conteúdo de patches binários
+    - Mantém os cabeçalhos dos arquivos e dos hunks ("@@")
+    - Limita cada hunk a max_hunk_lines linhas
+    - Limita o total a max_chars caracteres
+    """
+    lines = []
+    in_hunk = False
+    in_binary = False
+    hunk_lines = 0
+
+    for line in diff.splitlines():
+        if line.startswith("diff --git"):
+            in_hunk = in_binary = False
+        elif in_binary or line.startswith("index "):
+            continue
+        elif line.startswith("GIT binary patch"):
+            in_binary = True
+            lines.append("(patch binário omitido)")
+            continue
+        elif line.startswith("@@"):
+            in_hunk = True
+            hunk_lines = 0
+        elif in_hunk:
+            hunk_lines += 1
+            if hunk_lines > max_hunk_lines:
+                if hunk_lines == max_hunk_lines + 1:
+                    lines.append("[... linhas omitidas]")
+                continue
+
+        lines.append(line)
+
+    summary = "\n".join(lines)
+    if len(summary) > max_chars:
+        summary = summary[:max_chars] + "\n[... diff truncado]"
+
+    return summary
+
+
 def is_valid_conventional_commit(message):
     """
     Valida se a mensagem segue a especificação Conventional Commits 1.0.0.
@@ -73,55 +205,21 @@ def is_valid_conventional_commit(message):
     - chore: commit normal
       BREAKING CHANGE: breaking change no footer
     """
-    # Define os tipos permitidos (não case sensitive)
-    TYPES = [
-        "feat",
-        "fix",
-        "docs",
-        "style",
-        "refactor",
-        "perf",
-        "test",
-        "chore",
-        "build",
-        "ci",
-        "revert",
-    ]
-
     # Separa o header (primeira linha) do resto da mensagem
     parts = message.split("\n", 1)
     header = parts[0].strip()
     body_and_footer = parts[1].strip() if len(parts) > 1 else ""
 
-    # Padrão para o header:
-    # - tipo (obrigatório)
-    # - escopo (opcional, entre parênteses)
-    # - ! (opcional, para breaking changes)
-    # - : e espaço (obrigatório)
-    # - descrição (obrigatório)
-    header_pattern = (
-        r"^("  # início da string
-        r"(?P<type>" + "|".join(TYPES) + r")"  # tipo
-        r"(?:\((?P<scope>[^)]+)\))?"  # escopo opcional
-        r"(?P<breaking>!)?"  # breaking change opcional
-        r": "  # : e espaço obrigatórios
-        r"(?P<description>.+)"  # descrição
-        r")$"
-    )
-
-    header_match = re.match(header_pattern, header, re.IGNORECASE)
+    header_match = _HEADER_RE.match(header)
     if not header_match:
         return False
 
     # Se tem corpo ou footer, verifica se há BREAKING CHANGE
     if body_and_footer:
-        # Footers devem estar separados por linha em branco do corpo
-        footer_pattern = r"BREAKING[ -]CHANGE: .*"
-
         # Se tem ! no header ou BREAKING CHANGE no footer, é válido
         has_breaking_change = bool(
             header_match.group("breaking")
-            or re.search(footer_pattern, body_and_footer, re.IGNORECASE)
+            or _FOOTER_RE.search(body_and_footer)
         )
 
         # Se não tem breaking change mas tem conteúdo, é só um corpo normal
@@ -12,6 +12,12 @@ setup(
         "setuptools>=75.8.0",
         "openai==1.65.1"
     ],
+    extras_require={
+        "pygit2": ["pygit2>=1.12"],
+        "orjson": ["orjson>=3.6"],
+        "re2": ["google-re2>=1.0"],
+        "http2": ["httpx[http2]"],
+    },
     python_requires=">=3.8",  # Especifica versão mínima do Python
     entry_points={
         "console_scripts": ["seshat=seshat.cli:cli"],